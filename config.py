@@ -3,49 +3,93 @@ Configuration for Penumbra Analytics Service
 """
 
 import os
+import functools
+import logging
+from dataclasses import dataclass
 from typing import Optional
 
+logger = logging.getLogger('config')
+
+@functools.cache
+def _env_int(name: str, default: int) -> int:
+    """Read an integer environment variable (env is fixed after process start)"""
+    return int(os.getenv(name, str(default)))
+
+@functools.cache
+def _env_float(name: str, default: float) -> float:
+    """Read a float environment variable (env is fixed after process start)"""
+    return float(os.getenv(name, str(default)))
+
+@dataclass(frozen=True, slots=True)
 class Config:
     """Configuration class for the service"""
+
+    # Penumbra endpoints
+    PENUMBRA_RPC_ENDPOINT: str
+    PENUMBRA_GRPC_ENDPOINT: str
+    PENUMBRA_INDEXER_ENDPOINT: Optional[str]
+    PENUMBRA_INDEXER_CA_CERT: Optional[str]
+
+    # Discord
+    DISCORD_WEBHOOK_URL: Optional[str]
+
+    # API Server
+    API_PORT: int
+    METRICS_PORT: int
+
+    # Service configuration
+    UPDATE_INTERVAL_SECONDS: int
+    DISCORD_INTERVAL_HOURS: float
+    RPC_CONCURRENCY: int
+
+@functools.cache
+def load_config() -> Config:
+    """Load, validate and announce the configuration once per process"""
+    config = Config(
+        PENUMBRA_RPC_ENDPOINT=os.getenv('PENUMBRA_RPC_ENDPOINT', 'https://rpc-penumbra.radiantcommons.com'),
+        PENUMBRA_GRPC_ENDPOINT=os.getenv('PENUMBRA_GRPC_ENDPOINT', 'https://penumbra-1.radiantcommons.com'),
+        PENUMBRA_INDEXER_ENDPOINT=os.getenv('PENUMBRA_INDEXER_ENDPOINT'),
+        PENUMBRA_INDEXER_CA_CERT=os.getenv('PENUMBRA_INDEXER_CA_CERT'),
+        DISCORD_WEBHOOK_URL=os.getenv('DISCORD_WEBHOOK_URL'),
+        API_PORT=_env_int('API_PORT', 8080),
+        METRICS_PORT=_env_int('METRICS_PORT', 8081),
+        UPDATE_INTERVAL_SECONDS=_env_int('UPDATE_INTERVAL_SECONDS', 30),
+        DISCORD_INTERVAL_HOURS=_env_float('DISCORD_INTERVAL_HOURS', 3),
+        RPC_CONCURRENCY=_env_int('RPC_CONCURRENCY', 4),
+    )
+    _validate(config)
+    return config
+
+def _validate(config: Config):
+    """Validate required configuration"""
+    required_fields = [
+        ('PENUMBRA_RPC_ENDPOINT', config.PENUMBRA_RPC_ENDPOINT),
+        ('DISCORD_WEBHOOK_URL', config.DISCORD_WEBHOOK_URL),
+    ]
+
+    missing = [field for field, value in required_fields if not value]
+    if missing:
+        raise ValueError(f"Missing required configuration: {', '.join(missing)}")
+
+    # A zero-sized semaphore would block every collection forever
+    if config.RPC_CONCURRENCY < 1:
+        raise ValueError(f"RPC_CONCURRENCY must be at least 1, got {config.RPC_CONCURRENCY}")
+
+    # The collection loop schedules ticks in multiples of the interval
+    if config.UPDATE_INTERVAL_SECONDS < 1:
+        raise ValueError(f"UPDATE_INTERVAL_SECONDS must be at least 1, got {config.UPDATE_INTERVAL_SECONDS}")
+
+    if os.getenv('QUIET') or not logger.isEnabledFor(logging.INFO):
+        return
     
-    def __init__(self):
-        # Penumbra endpoints
-        self.PENUMBRA_RPC_ENDPOINT = os.getenv('PENUMBRA_RPC_ENDPOINT', 'https://rpc-penumbra.radiantcommons.com')
-        self.PENUMBRA_GRPC_ENDPOINT = os.getenv('PENUMBRA_GRPC_ENDPOINT', 'https://penumbra-1.radiantcommons.com')
-        self.PENUMBRA_INDEXER_ENDPOINT = os.getenv('PENUMBRA_INDEXER_ENDPOINT')
-        self.PENUMBRA_INDEXER_CA_CERT = os.getenv('PENUMBRA_INDEXER_CA_CERT')
-        
-        # Discord
-        self.DISCORD_WEBHOOK_URL = os.getenv('DISCORD_WEBHOOK_URL')
-        
-        # API Server
-        self.API_PORT = int(os.getenv('API_PORT', '8080'))
-        self.METRICS_PORT = int(os.getenv('METRICS_PORT', '8081'))
-        
-        # Service configuration
-        self.UPDATE_INTERVAL_SECONDS = int(os.getenv('UPDATE_INTERVAL_SECONDS', '30'))
-        self.DISCORD_INTERVAL_HOURS = float(os.getenv('DISCORD_INTERVAL_HOURS', '3'))
-        
-        # Validate required config
-        self._validate()
-    
-    def _validate(self):
-        """Validate required configuration"""
-        required_fields = [
-            ('PENUMBRA_RPC_ENDPOINT', self.PENUMBRA_RPC_ENDPOINT),
-            ('DISCORD_WEBHOOK_URL', self.DISCORD_WEBHOOK_URL),
-        ]
-        
-        missing = [field for field, value in required_fields if not value]
-        if missing:
-            raise ValueError(f"Missing required configuration: {', '.join(missing)}")
-        
-        print(f"✅ Configuration loaded:")
-        print(f"   RPC: {self.PENUMBRA_RPC_ENDPOINT}")
-        print(f"   gRPC: {self.PENUMBRA_GRPC_ENDPOINT}")
-        print(f"   Indexer: {'✅ Set' if self.PENUMBRA_INDEXER_ENDPOINT else '❌ Not set (will use fallbacks)'}")
-        print(f"   Indexer CA Cert: {'✅ Set' if self.PENUMBRA_INDEXER_CA_CERT else '❌ Not set'}")
-        print(f"   Discord: {'✅ Set' if self.DISCORD_WEBHOOK_URL else '❌ Not set'}")
-        print(f"   Update interval: {self.UPDATE_INTERVAL_SECONDS}s")
-        print(f"   Discord interval: {self.DISCORD_INTERVAL_HOURS}h")
-        print(f"   Metrics port: {self.METRICS_PORT}")
+    logger.info(
+        f"✅ Configuration loaded:\n"
+        f"   RPC: {config.PENUMBRA_RPC_ENDPOINT}\n"
+        f"   gRPC: {config.PENUMBRA_GRPC_ENDPOINT}\n"
+        f"   Indexer: {'✅ Set' if config.PENUMBRA_INDEXER_ENDPOINT else '❌ Not set (will use fallbacks)'}\n"
+        f"   Indexer CA Cert: {'✅ Set' if config.PENUMBRA_INDEXER_CA_CERT else '❌ Not set'}\n"
+        f"   Discord: {'✅ Set' if config.DISCORD_WEBHOOK_URL else '❌ Not set'}\n"
+        f"   Update interval: {config.UPDATE_INTERVAL_SECONDS}s\n"
+        f"   Discord interval: {config.DISCORD_INTERVAL_HOURS}h\n"
+        f"   Metrics port: {config.METRICS_PORT}"
+    )
@@ -3,204 +3,401 @@ Data collection from Penumbra RPC and Pindexer
 """
 
 import asyncio
+import functools
 import aiohttp
+import orjson
 import ssl
 import logging
 import time
-import tempfile
-import os
-from datetime import datetime
-from typing import Dict, Any, Optional
-import json
-import psycopg2
-from psycopg2.extras import RealDictCursor
+from datetime import datetime, timezone
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Dict, Any, Final, List, Mapping, Optional, Tuple
+
+if TYPE_CHECKING:
+    import asyncpg
 
 logger = logging.getLogger('data-collector')
 
+# Built once per process: create_default_context() parses the system CA bundle
+_SSL_CONTEXT = ssl.create_default_context()
+
+# Known display symbols, keyed by the first 8 hex chars of the asset ID
+# (pindexer queries return only this prefix)
+_KNOWN_ASSETS: Final[Mapping[str, str]] = MappingProxyType({
+    "29ea9c2f": "UM",      # 29ea9c2f3371f6a487e7e95c247041f4a356f983eb064e5d2b3bcf322ca96a10
+    "76b3e4b1": "USDC",    # 76b3e4b10681358c123b381f90638476b7789040e47802de879f0fb3eedc8d0b
+    "5314b33e": "allBTC",  # 5314b33eecfd5ca2e99c0b6d1e0ccafe3d2dd581c952d814fb64fdf51f85c411
+})
+_UNKNOWN_FMT: Final = "{}...".format
+
+# Epoch, LQT, staking, address and DEX aggregates in a single round-trip
+_INDEXER_SUMMARY_QUERY: Final = """
+    WITH epoch AS (
+        SELECT epoch, ends_in_s
+        FROM lqt.summary
+        ORDER BY epoch DESC
+        LIMIT 1
+    ), aggregate AS (
+        SELECT direct_volume, liquidity, trades, active_pairs
+        FROM dex_ex_aggregate_summary
+        WHERE the_window = '1d'
+        LIMIT 1
+    )
+    SELECT
+        (SELECT epoch FROM epoch) as epoch,
+        (SELECT ends_in_s FROM epoch) as ends_in_s,
+        (SELECT COUNT(*) FROM lqt.delegator_summary) as participant_count,
+        (SELECT COUNT(*) FROM stake_validator_set WHERE voting_power > 0) as active_validators,
+        (SELECT SUM(voting_power) FROM stake_validator_set) as total_voting_power,
+        (SELECT COUNT(DISTINCT address) FROM lqt._votes
+         WHERE epoch >= (SELECT MAX(epoch) - 1 FROM lqt._votes)) as recent_active_addresses,
+        (SELECT direct_volume FROM aggregate) as direct_volume,
+        (SELECT liquidity FROM aggregate) as liquidity,
+        (SELECT active_pairs FROM aggregate) as active_pairs
+"""
+
+# Prefix slicing and volume scaling happen in SQL; rows are unpacked positionally
+_INDEXER_TOP_PAIRS_QUERY: Final = """
+    SELECT
+        SUBSTRING(ENCODE(asset_start, 'hex') FOR 8) as asset_start_prefix,
+        SUBSTRING(ENCODE(asset_end, 'hex') FOR 8) as asset_end_prefix,
+        COALESCE(direct_volume_over_window + swap_volume_over_window, 0)::double precision
+            / 1000000 as volume_usd
+    FROM dex_ex_pairs_summary
+    WHERE the_window = '1d'
+    ORDER BY direct_volume_over_window + swap_volume_over_window DESC
+    LIMIT 10
+"""
+
+# Fallback trading data is constant, so it is built once at import
+_FALLBACK_TOP_PAIRS: Final = (
+    {"name": "UM/USDC", "volume": "4,142.8 USDC", "volume_usd": 4142.8},
+    {"name": "T414E72/UM", "volume": "1,040.0 USDC", "volume_usd": 1040.0},
+    {"name": "UM/T414E72", "volume": "1,013.4 USDC", "volume_usd": 1013.4},
+    {"name": "ATOM/UM", "volume": "38.4 USDC", "volume_usd": 38.4},
+    {"name": "ATOM/USDC", "volume": "35.4 USDC", "volume_usd": 35.4}
+)
+_FALLBACK_TOTAL_VOLUME: Final = sum(pair['volume_usd'] for pair in _FALLBACK_TOP_PAIRS)
+_FALLBACK_TRADING_DATA: Final = {
+    'active_pairs_count': 5,
+    'total_volume_24h': _FALLBACK_TOTAL_VOLUME,
+    'dex_tvl': _FALLBACK_TOTAL_VOLUME * 25,  # 25x estimate
+    'lqt_total_participants': 1024,
+    'lqt_active_24h': 25,
+    'lqt_volume_24h': _FALLBACK_TOTAL_VOLUME * 0.8,
+    'active_addresses_daily': min(85 + int(_FALLBACK_TOTAL_VOLUME / 800), 150),  # Dynamic based on volume
+    'active_addresses_weekly': min(85 * 6 + int(_FALLBACK_TOTAL_VOLUME / 150), 800),  # Weekly estimate
+    'trading_pairs_count': 5,
+    'unique_asset_types': 10
+}
+
+# Estimated transaction rates until real per-block counts are queried
+_TX_TOTAL_24H: Final = 253
+_TX_DEFAULTS: Final = {
+    'total_24h': _TX_TOTAL_24H,
+    'per_second': round(_TX_TOTAL_24H / (24 * 60 * 60), 3),  # ~0.003
+    'per_minute': round(_TX_TOTAL_24H / (24 * 60), 1),  # ~0.176
+    'rate_per_hour': round(_TX_TOTAL_24H / 24, 1)  # ~10.5
+}
+
+def create_client_session() -> aiohttp.ClientSession:
+    """Create a pooled HTTP session for outbound RPC and webhook calls; must be called inside the event loop"""
+    return aiohttp.ClientSession(
+        # Fail fast on a dead endpoint instead of spending the whole budget on connect
+        timeout=aiohttp.ClientTimeout(total=10, sock_connect=2, sock_read=5),
+        connector=aiohttp.TCPConnector(
+            ssl=_SSL_CONTEXT,
+            limit=32,
+            limit_per_host=4,
+            keepalive_timeout=75,
+            ttl_dns_cache=300,
+            enable_cleanup_closed=True
+        )
+    )
+
 class PenumbraDataCollector:
-    def __init__(self, rpc_endpoint: str, indexer_endpoint: Optional[str] = None, indexer_ca_cert: Optional[str] = None):
+    # Constant parts of the collect_all_data response, merged into each section per call
+    _STATIC_TEMPLATE: Final = {
+        "bot_health": {"errors_last_24h": 0, "status": "healthy", "uptime_hours": 24},
+        "google_analytics": {"configured": False, "healthy": False},
+        "lqt": {"rewards_distributed_usd": 0},
+        "metadata": {"api_version": "v1.0", "data_freshness_seconds": 30, "source": "penumbra-analytics-service"},
+        "network": {"avg_block_time_seconds": 6, "network_uptime_percentage": 99.9},
+        "prax_wallet": {
+            "active_users_daily": 33,
+            "active_users_monthly": 636,
+            "downloads_daily": 11,
+            "downloads_total": 1580,
+            "downloads_weekly": 53
+        },
+        "staking": {"staking_percentage": 0},
+        "tvl": {"source": "estimated"},
+    }
+    
+    def __init__(self, rpc_endpoint: str, indexer_endpoint: Optional[str] = None, indexer_ca_cert: Optional[str] = None,
+                 rpc_concurrency: int = 4, session: Optional[aiohttp.ClientSession] = None):
         self.rpc_endpoint = rpc_endpoint.rstrip('/')
         self.indexer_endpoint = indexer_endpoint
         self.indexer_ca_cert = indexer_ca_cert
-        self.session = None
+        # A caller-supplied session is shared and left open on exit
+        self.session = session
+        self._owns_session = session is None
+        self._open = False
+        self._indexer_pool = None
+        self._sslmode = None
+        
+        # Caps how many sub-collectors hit the endpoints at once
+        self._rpc_semaphore = asyncio.Semaphore(rpc_concurrency)
+        
+        # Normalized once; SSL contexts are built from it in memory
+        self._ca_cert = self._load_ca_cert(indexer_ca_cert) if indexer_ca_cert else None
         logger.info(f"Data collector initialized - RPC: {rpc_endpoint}")
     
     async def __aenter__(self):
-        ssl_context = ssl.create_default_context()
-        ssl_context.check_hostname = False
-        ssl_context.verify_mode = ssl.CERT_NONE
-        self.session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=10), connector=aiohttp.TCPConnector(ssl=ssl_context))
+        if self._open:
+            # Re-entering would orphan the open session and its connector
+            raise RuntimeError("PenumbraDataCollector is already open")
+        self._open = True
+        
+        # One pooled session for the lifetime of the service so keep-alive
+        # connections to the RPC endpoint survive across collection cycles
+        if self._owns_session:
+            self.session = create_client_session()
+        if self.indexer_endpoint:
+            try:
+                await self._open_indexer_pool()
+            except Exception as e:
+                # Retried lazily on the next query; fallback data is used meanwhile
+                logger.error(f"Error connecting to pindexer: {e}")
         return self
     
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        if self.session:
+        self._open = False
+        if self._owns_session and self.session:
             await self.session.close()
+            self.session = None
+        if self._indexer_pool:
+            await self._indexer_pool.close()
+            self._indexer_pool = None
     
-    def get_pair_display_name(self, asset_start_hex: str, asset_end_hex: str) -> str:
-        """Convert asset hex IDs to readable pair names"""
-        known_assets = {
-            "29ea9c2f3371f6a487e7e95c247041f4a356f983eb064e5d2b3bcf322ca96a10": "UM",
-            "76b3e4b10681358c123b381f90638476b7789040e47802de879f0fb3eedc8d0b": "USDC",
-            "5314b33eecfd5ca2e99c0b6d1e0ccafe3d2dd581c952d814fb64fdf51f85c411": "allBTC",
-        }
+    async def _bounded(self, coro):
+        """Run a sub-collector under the concurrency limit"""
+        async with self._rpc_semaphore:
+            return await coro
+    
+    @staticmethod
+    def _load_ca_cert(ca_cert: str) -> str:
+        """Normalize the pindexer CA certificate into PEM text"""
+        # Ensure certificate has proper format - convert \n to actual newlines
+        cert_content = ca_cert.strip().replace('\\n', '\n')
+        if not cert_content.endswith('\n'):
+            cert_content += '\n'
+        
+        if not (cert_content.startswith('-----BEGIN CERTIFICATE-----')
+                and cert_content.rstrip().endswith('-----END CERTIFICATE-----')):
+            logger.warning("Indexer CA cert does not look like a PEM certificate")
         
-        start_symbol = known_assets.get(asset_start_hex)
+        logger.debug("Indexer CA cert loaded: %d lines", len(cert_content.splitlines()))
+        return cert_content
+    
+    def _indexer_ssl(self, sslmode: Optional[str]):
+        """Build the asyncpg `ssl` argument for a libpq-style sslmode"""
+        if sslmode in ('verify-full', 'verify-ca'):
+            ssl_context = ssl.create_default_context(cadata=self._ca_cert)
+            ssl_context.check_hostname = sslmode == 'verify-full'
+            return ssl_context
+        return sslmode
+    
+    async def _open_indexer_pool(self) -> 'asyncpg.Pool':
+        """Create the pindexer connection pool, probing the SSL mode only once"""
+        # Deferred so the fallback-only deployment never loads asyncpg
+        import asyncpg
+        
+        # Try different SSL connection approaches, strictest first
+        sslmodes = ('verify-full', 'verify-ca', 'require') if self._ca_cert else (None,)
+        
+        last_error = None
+        for sslmode in sslmodes:
+            try:
+                pool = await asyncpg.create_pool(
+                    self.indexer_endpoint,
+                    ssl=self._indexer_ssl(sslmode),
+                    min_size=1,
+                    max_size=2
+                )
+            except Exception as e:
+                logger.warning(f"{sslmode or 'default'} SSL mode failed: {e}")
+                last_error = e
+                continue
+            
+            self._indexer_pool = pool
+            self._sslmode = sslmode
+            logger.info(f"Connected to pindexer with {self._sslmode or 'default'} SSL mode")
+            return pool
+        
+        raise last_error
+    
+    @staticmethod
+    @functools.lru_cache(maxsize=256)
+    def get_pair_display_name(asset_start_hex: str, asset_end_hex: str) -> str:
+        """Convert asset hex IDs to readable pair names"""
+        start_symbol = _KNOWN_ASSETS.get(asset_start_hex)
         if not start_symbol:
-            start_prefix = asset_start_hex[:8] if asset_start_hex else "Unknown"
-            start_symbol = f"{start_prefix}..."
+            start_symbol = _UNKNOWN_FMT(asset_start_hex[:8] if asset_start_hex else "Unknown")
             
-        end_symbol = known_assets.get(asset_end_hex)
+        end_symbol = _KNOWN_ASSETS.get(asset_end_hex)
         if not end_symbol:
-            end_prefix = asset_end_hex[:8] if asset_end_hex else "Unknown"
-            end_symbol = f"{end_prefix}..."
+            end_symbol = _UNKNOWN_FMT(asset_end_hex[:8] if asset_end_hex else "Unknown")
         
         return f"{start_symbol}/{end_symbol}"
     
     async def collect_all_data(self) -> Dict[str, Any]:
         """Collect all data and return structured response"""
-        ssl_context = ssl.create_default_context()
-        ssl_context.check_hostname = False
-        ssl_context.verify_mode = ssl.CERT_NONE
-        async with aiohttp.ClientSession(
-            timeout=aiohttp.ClientTimeout(total=10),
-            connector=aiohttp.TCPConnector(ssl=ssl_context)
-        ) as session:
-            self.session = session
-            
-            # Collect data from all sources
-            trading_data = await self.get_trading_data()  # Get trading data first for epoch
-            network_data = await self.get_network_data(trading_data.get('current_epoch', 0), trading_data)
-            transactions_data = await self.get_transactions_data()
-            
-            # Build comprehensive response matching the expected format
-            data = {
-                "addresses": {
-                    "active_daily": trading_data.get('active_addresses_daily', 0),
-                    "active_weekly": trading_data.get('active_addresses_weekly', 0),
-                    "exchange_addresses_daily": trading_data.get('exchange_addresses_daily', 0),
-                    "exchange_addresses_weekly": trading_data.get('exchange_addresses_weekly', 0)
-                },
-                "assets": {
-                    "total_value_usd": trading_data.get('total_asset_value', 0),
-                    "trading_pairs_count": trading_data.get('trading_pairs_count', 0),
-                    "unique_types_count": trading_data.get('unique_asset_types', 0)
-                },
-                "bot_health": {
-                    "errors_last_24h": 0,
-                    "last_update": datetime.now().isoformat(),
-                    "status": "healthy",
-                    "uptime_hours": 24
-                },
-                "data_sources": {
-                    "google_analytics": {
-                        "configured": False,
-                        "healthy": False,
-                        "last_check": datetime.now().isoformat()
-                    },
-                    "indexer": {
-                        "configured": bool(self.indexer_endpoint),
-                        "healthy": bool(self.indexer_endpoint),
-                        "last_check": datetime.now().isoformat()
-                    },
-                    "penumbra_node": {
-                        "endpoint": self.rpc_endpoint,
-                        "healthy": True,
-                        "last_check": datetime.now().isoformat()
-                    }
-                },
-                "lqt": {
-                    "active_participants_24h": trading_data.get('lqt_active_24h', 0),
-                    "rewards_distributed_usd": 0,
-                    "total_participants": trading_data.get('lqt_total_participants', 1024),
-                    "total_volume_usd": trading_data.get('lqt_total_volume', 0),
-                    "volume_24h_usd": trading_data.get('lqt_volume_24h', 0)
-                },
-                "metadata": {
-                    "api_version": "v1.0",
-                    "data_freshness_seconds": 30,
-                    "source": "penumbra-analytics-service",
-                    "timestamp": datetime.now().isoformat()
-                },
-                "network": {
-                    "avg_block_time_seconds": 6,
-                    "block_height": network_data.get('block_height', 0),
-                    "current_epoch": network_data.get('current_epoch', 0),
-                    "epoch_ends_in_seconds": trading_data.get('epoch_ends_in_seconds', 0),
-                    "epoch_ends_in_hours": round(trading_data.get('epoch_ends_in_seconds', 0) / 3600, 1),
-                    "network_uptime_percentage": 99.9
-                },
-                "prax_wallet": {
-                    "active_users_daily": 33,
-                    "active_users_monthly": 636,
-                    "downloads_daily": 11,
-                    "downloads_total": 1580,
-                    "downloads_weekly": 53
-                },
-                "staking": {
-                    "active_validators": network_data.get('active_validators', 0),
-                    "staking_percentage": 0,
-                    "total_staked_um": network_data.get('total_staked_um', 0),
-                    "total_staked_usd": network_data.get('total_staked_usd', 0),
-                    "total_voting_power": network_data.get('total_voting_power', 0)
-                },
-                "trading": {
-                    "active_pairs_count": trading_data.get('active_pairs_count', 5),
-                    "top_pairs": trading_data.get('top_pairs', []),
-                    "total_volume_24h_usd": trading_data.get('total_volume_24h', 0)
-                },
-                "transactions": {
-                    "per_minute": transactions_data.get('per_minute', 0),
-                    "per_second": transactions_data.get('per_second', 0),
-                    "rate_per_hour": transactions_data.get('rate_per_hour', 0),
-                    "total_24h": transactions_data.get('total_24h', 253)
+        assert self.session is not None, "use PenumbraDataCollector as an async context manager"
+        
+        # Collect data from all sources concurrently; a failing source doesn't abort the tick
+        trading_data, node_status, transactions_data = await asyncio.gather(
+            self._bounded(self.get_trading_data()),
+            self._bounded(self.get_node_status()),
+            self._bounded(self.get_transactions_data()),
+            return_exceptions=True
+        )
+        
+        if isinstance(trading_data, Exception):
+            logger.error("Error getting trading data: %s", trading_data)
+            trading_data = self.get_fallback_trading_data()
+        if isinstance(node_status, Exception):
+            logger.error("Error getting network data: %s", node_status)
+            node_status = None
+        if isinstance(transactions_data, Exception):
+            logger.error("Error getting transaction data: %s", transactions_data)
+            transactions_data = {}
+        
+        # Network figures combine RPC status with staking data from the indexer
+        network_data = self.build_network_data(trading_data.get('current_epoch', 0), trading_data, node_status)
+        
+        # One timestamp shared by every freshness field in the response
+        now_iso = datetime.now(timezone.utc).isoformat()
+        
+        # Build comprehensive response matching the expected format:
+        # static scaffolding comes from the class template, dynamic leaves are patched in
+        static = self._STATIC_TEMPLATE
+        data = {
+            "addresses": {
+                "active_daily": trading_data.get('active_addresses_daily', 0),
+                "active_weekly": trading_data.get('active_addresses_weekly', 0),
+                "exchange_addresses_daily": trading_data.get('exchange_addresses_daily', 0),
+                "exchange_addresses_weekly": trading_data.get('exchange_addresses_weekly', 0)
+            },
+            "assets": {
+                "total_value_usd": trading_data.get('total_asset_value', 0),
+                "trading_pairs_count": trading_data.get('trading_pairs_count', 0),
+                "unique_types_count": trading_data.get('unique_asset_types', 0)
+            },
+            "bot_health": {**static["bot_health"], "last_update": now_iso},
+            "data_sources": {
+                "google_analytics": {**static["google_analytics"], "last_check": now_iso},
+                "indexer": {
+                    "configured": bool(self.indexer_endpoint),
+                    "healthy": bool(self.indexer_endpoint),
+                    "last_check": now_iso
                 },
-                "tvl": {
-                    "dex_usd": trading_data.get('dex_tvl', 0),
-                    "source": "estimated",
-                    "staking_usd": network_data.get('staking_tvl', 0),
-                    "total_usd": trading_data.get('dex_tvl', 0) + network_data.get('staking_tvl', 0)
+                "penumbra_node": {
+                    "endpoint": self.rpc_endpoint,
+                    "healthy": True,
+                    "last_check": now_iso
                 }
+            },
+            "lqt": {
+                **static["lqt"],
+                "active_participants_24h": trading_data.get('lqt_active_24h', 0),
+                "total_participants": trading_data.get('lqt_total_participants', 1024),
+                "total_volume_usd": trading_data.get('lqt_total_volume', 0),
+                "volume_24h_usd": trading_data.get('lqt_volume_24h', 0)
+            },
+            "metadata": {**static["metadata"], "timestamp": now_iso},
+            "network": {
+                **static["network"],
+                "block_height": network_data.get('block_height', 0),
+                "current_epoch": network_data.get('current_epoch', 0),
+                "epoch_ends_in_seconds": trading_data.get('epoch_ends_in_seconds', 0),
+                "epoch_ends_in_hours": round(trading_data.get('epoch_ends_in_seconds', 0) / 3600, 1)
+            },
+            "prax_wallet": dict(static["prax_wallet"]),
+            "staking": {
+                **static["staking"],
+                "active_validators": network_data.get('active_validators', 0),
+                "total_staked_um": network_data.get('total_staked_um', 0),
+                "total_staked_usd": network_data.get('total_staked_usd', 0),
+                "total_voting_power": network_data.get('total_voting_power', 0)
+            },
+            "trading": {
+                "active_pairs_count": trading_data.get('active_pairs_count', 5),
+                "top_pairs": trading_data.get('top_pairs', []),
+                "total_volume_24h_usd": trading_data.get('total_volume_24h', 0)
+            },
+            "transactions": {
+                "per_minute": transactions_data.get('per_minute', 0),
+                "per_second": transactions_data.get('per_second', 0),
+                "rate_per_hour": transactions_data.get('rate_per_hour', 0),
+                "total_24h": transactions_data.get('total_24h', 253)
+            },
+            "tvl": {
+                **static["tvl"],
+                "dex_usd": trading_data.get('dex_tvl', 0),
+                "staking_usd": network_data.get('staking_tvl', 0),
+                "total_usd": trading_data.get('dex_tvl', 0) + network_data.get('staking_tvl', 0)
             }
+        }
+        
+        return data
+    
+    async def _batch_rpc(self, calls: List[Tuple[str, Dict[str, Any]]]) -> List[Any]:
+        """Send JSON-RPC calls in a single HTTP request and return their results in call order"""
+        payload = [
+            {"jsonrpc": "2.0", "id": i, "method": method, "params": params}
+            for i, (method, params) in enumerate(calls)
+        ]
+        async with self.session.post(
+            f"{self.rpc_endpoint}/",
+            data=orjson.dumps(payload),
+            headers={'Content-Type': 'application/json'}
+        ) as resp:
+            resp.raise_for_status()
+            responses = await resp.json(loads=orjson.loads)
+        
+        # CometBFT unwraps single-response batches (and whole-batch errors) into a bare object
+        if isinstance(responses, dict):
+            responses = [responses]
+        if not isinstance(responses, list) or not all(isinstance(response, dict) for response in responses):
+            raise RuntimeError(f"Malformed JSON-RPC batch response: {responses!r:.200}")
+        
+        by_id = {response.get('id'): response for response in responses}
+        results = []
+        for i, (method, _) in enumerate(calls):
+            response = by_id.get(i)
+            if response is None or 'error' in response:
+                error = response.get('error') if response else 'no response'
+                raise RuntimeError(f"RPC {method} failed: {error}")
+            results.append(response['result'])
+        return results
+    
+    async def get_node_status(self) -> Dict[str, Any]:
+        """Get current sync status from Penumbra RPC"""
+        # A lone call gains nothing from _batch_rpc; move it there once other per-tick reads join it
+        async with self.session.get(f"{self.rpc_endpoint}/status") as resp:
+            resp.raise_for_status()
+            status = await resp.json(loads=orjson.loads)
             
-            return data
+            sync_info = status["result"]["sync_info"]
+            return {
+                'block_height': int(sync_info["latest_block_height"]),
+                'block_time': sync_info["latest_block_time"]
+            }
     
-    async def get_network_data(self, current_epoch: int = 0, trading_data: Dict[str, Any] = None) -> Dict[str, Any]:
-        """Get network data from Penumbra RPC"""
-        try:
-            # Get current status
-            async with self.session.get(f"{self.rpc_endpoint}/status") as resp:
-                status = await resp.json()
-                
-                sync_info = status["result"]["sync_info"]
-                block_height = int(sync_info["latest_block_height"])
-                block_time = sync_info["latest_block_time"]
-                
-                # Use real data from trading_data if available
-                active_validators = trading_data.get('active_validators', 0) if trading_data else 0
-                total_voting_power = trading_data.get('total_voting_power', 0) if trading_data else 0
-                
-                # Convert voting power from UM micro-units to UM tokens
-                total_staked_um = float(total_voting_power) / 1_000_000 if total_voting_power else 0
-                
-                # Don't convert UM to USD with fake pricing - keep staking TVL separate
-                # Staking amounts should be shown in UM, not USD
-                total_staked_usd = 0  # Don't include UM staking in USD TVL calculations
-                
-                logger.info(f"Network status: Height {block_height}, Epoch {current_epoch}, Validators {active_validators}")
-                
-                return {
-                    'block_height': block_height,
-                    'current_epoch': current_epoch,
-                    'block_time': block_time,
-                    'active_validators': active_validators,  # Real data
-                    'total_staked_um': total_staked_um,  # Real data (converted from micro-units)
-                    'total_staked_usd': total_staked_usd,  # Estimated from real UM data
-                    'total_voting_power': total_voting_power,  # Real data in micro-units
-                    'staking_tvl': total_staked_usd  # Same as total_staked_usd
-                }
-                
-        except Exception as e:
-            logger.error(f"Error getting network data: {e}")
+    def build_network_data(self, current_epoch: int, trading_data: Dict[str, Any], node_status: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Combine RPC node status with staking figures from trading data"""
+        if node_status is None:
             return {
                 'block_height': 0,
                 'current_epoch': 0,
@@ -210,6 +407,32 @@ class PenumbraDataCollector:
                 'total_voting_power': 0,
                 'staking_tvl': 0
             }
+        
+        block_height = node_status['block_height']
+        
+        # Use real data from trading_data if available
+        active_validators = trading_data.get('active_validators', 0)
+        total_voting_power = trading_data.get('total_voting_power', 0)
+        
+        # Convert voting power from UM micro-units to UM tokens
+        total_staked_um = float(total_voting_power) / 1_000_000 if total_voting_power else 0
+        
+        # Don't convert UM to USD with fake pricing - keep staking TVL separate
+        # Staking amounts should be shown in UM, not USD
+        total_staked_usd = 0  # Don't include UM staking in USD TVL calculations
+        
+        logger.info("Network status: Height %d, Epoch %d, Validators %d", block_height, current_epoch, active_validators)
+        
+        return {
+            'block_height': block_height,
+            'current_epoch': current_epoch,
+            'block_time': node_status['block_time'],
+            'active_validators': active_validators,  # Real data
+            'total_staked_um': total_staked_um,  # Real data (converted from micro-units)
+            'total_staked_usd': total_staked_usd,  # Estimated from real UM data
+            'total_voting_power': total_voting_power,  # Real data in micro-units
+            'staking_tvl': total_staked_usd  # Same as total_staked_usd
+        }
     
     async def get_trading_data(self) -> Dict[str, Any]:
         """Get trading data from Pindexer or fallback"""
@@ -220,137 +443,31 @@ class PenumbraDataCollector:
     
     async def get_indexer_trading_data(self) -> Dict[str, Any]:
         """Get real trading data from pindexer"""
-        temp_cert_file = None
         try:
             # Connect to pindexer database
-            if self.indexer_ca_cert:
-                # Create temporary file with CA certificate content
-                temp_cert_file = tempfile.NamedTemporaryFile(mode='w', suffix='.crt', delete=False)
-                
-                # Ensure certificate has proper format - convert \n to actual newlines
-                cert_content = self.indexer_ca_cert.strip().replace('\\n', '\n')
-                if not cert_content.endswith('\n'):
-                    cert_content += '\n'
-                
-                temp_cert_file.write(cert_content)
-                temp_cert_file.flush()
-                temp_cert_file.close()
-                
-                # Debug: check if file was written properly
-                logger.info(f"CA cert file created: {temp_cert_file.name}, size: {os.path.getsize(temp_cert_file.name)} bytes")
-                
-                # Debug: show first and last lines of certificate
-                with open(temp_cert_file.name, 'r') as f:
-                    lines = f.readlines()
-                    logger.info(f"Certificate first line: {lines[0].strip()}")
-                    logger.info(f"Certificate last line: {lines[-1].strip()}")
-                    logger.info(f"Total lines in certificate: {len(lines)}")
-                
-                # Try different SSL connection approaches
-                try:
-                    conn = psycopg2.connect(self.indexer_endpoint, sslmode='verify-full', sslrootcert=temp_cert_file.name)
-                    logger.info("Connected with verify-full SSL mode")
-                except Exception as ssl_error:
-                    logger.warning(f"verify-full failed: {ssl_error}, trying verify-ca")
-                    try:
-                        conn = psycopg2.connect(self.indexer_endpoint, sslmode='verify-ca', sslrootcert=temp_cert_file.name) 
-                        logger.info("Connected with verify-ca SSL mode")
-                    except Exception as ssl_error2:
-                        logger.warning(f"verify-ca failed: {ssl_error2}, trying require mode")
-                        conn = psycopg2.connect(self.indexer_endpoint, sslmode='require')
-                        logger.info("Connected with require SSL mode (no cert verification)")
-            else:
-                conn = psycopg2.connect(self.indexer_endpoint)
-            cursor = conn.cursor(cursor_factory=RealDictCursor)
+            pool = self._indexer_pool or await self._open_indexer_pool()
             
-            cursor.execute("""
-                SELECT epoch, ends_in_s
-                FROM lqt.summary
-                ORDER BY epoch DESC
-                LIMIT 1
-            """)
+            # Each query checks out its own pooled connection, so both run concurrently
+            summary, pairs_data = await asyncio.gather(
+                pool.fetchrow(_INDEXER_SUMMARY_QUERY),
+                pool.fetch(_INDEXER_TOP_PAIRS_QUERY)
+            )
             
-            epoch_result = cursor.fetchone()
-            current_epoch = epoch_result['epoch'] if epoch_result else 0
-            epoch_ends_in_seconds = epoch_result['ends_in_s'] if epoch_result else 0
+            current_epoch = summary['epoch'] or 0
+            epoch_ends_in_seconds = summary['ends_in_s'] or 0
+            real_lqt_participants = summary['participant_count']
+            real_active_validators = summary['active_validators']
+            total_voting_power = summary['total_voting_power']
+            real_recent_addresses = summary['recent_active_addresses']
             
-            # Get real LQT participant count
-            cursor.execute("""
-                SELECT COUNT(*) as participant_count
-                FROM lqt.delegator_summary
-            """)
-            
-            lqt_result = cursor.fetchone()
-            real_lqt_participants = lqt_result['participant_count'] if lqt_result else 0
-            
-            # Get real validator count
-            cursor.execute("""
-                SELECT COUNT(*) as active_validators
-                FROM stake_validator_set
-                WHERE voting_power > 0
-            """)
-            
-            validator_result = cursor.fetchone()
-            real_active_validators = validator_result['active_validators'] if validator_result else 0
-            
-            # Get real staking data
-            cursor.execute("""
-                SELECT SUM(voting_power) as total_voting_power
-                FROM stake_validator_set
-            """)
-            
-            staking_result = cursor.fetchone()
-            total_voting_power = staking_result['total_voting_power'] if staking_result else 0
-            
-            cursor.execute("""
-                SELECT COUNT(DISTINCT address) as recent_active_addresses
-                FROM lqt._votes
-                WHERE epoch >= (SELECT MAX(epoch) - 1 FROM lqt._votes)
-            """)
-            
-            recent_addresses_result = cursor.fetchone()
-            real_recent_addresses = recent_addresses_result['recent_active_addresses'] if recent_addresses_result else 0
-            
-            cursor.execute("""
-                SELECT direct_volume, liquidity, trades, active_pairs
-                FROM dex_ex_aggregate_summary
-                WHERE the_window = '1d'
-            """)
-            
-            aggregate_result = cursor.fetchone()
-            
-            cursor.execute("""
-                SELECT
-                    ENCODE(asset_start, 'hex') as asset_start_hex,
-                    ENCODE(asset_end, 'hex') as asset_end_hex,
-                    direct_volume_over_window + swap_volume_over_window as total_volume,
-                    liquidity,
-                    trades_over_window
-                FROM dex_ex_pairs_summary
-                WHERE the_window = '1d'
-                ORDER BY total_volume DESC
-                LIMIT 10
-            """)
-            
-            pairs_data = cursor.fetchall()
-            
-            if aggregate_result:
-                total_volume = float(aggregate_result['direct_volume']) / 1_000_000 if aggregate_result['direct_volume'] else 0
-                total_liquidity = float(aggregate_result['liquidity']) / 1_000_000 if aggregate_result['liquidity'] else 0
-                active_pairs_count = aggregate_result['active_pairs'] if aggregate_result['active_pairs'] else 0
-            else:
-                total_volume = 0
-                total_liquidity = 0
-                active_pairs_count = 0
+            total_volume = float(summary['direct_volume']) / 1_000_000 if summary['direct_volume'] else 0
+            total_liquidity = float(summary['liquidity']) / 1_000_000 if summary['liquidity'] else 0
+            active_pairs_count = summary['active_pairs'] or 0
             
             top_pairs = []
-            for pair in pairs_data:
-                volume_value = float(pair['total_volume']) / 1_000_000 if pair['total_volume'] else 0
+            for asset_start_prefix, asset_end_prefix, volume_value in pairs_data:
                 volume_str = f"{volume_value:,.1f} USDC" if volume_value else "0 USDC"
-                
-                asset_start_hex = pair['asset_start_hex'] if pair['asset_start_hex'] else "Unknown"
-                asset_end_hex = pair['asset_end_hex'] if pair['asset_end_hex'] else "Unknown"
-                pair_name = self.get_pair_display_name(asset_start_hex, asset_end_hex)
+                pair_name = self.get_pair_display_name(asset_start_prefix or "Unknown", asset_end_prefix or "Unknown")
                 
                 top_pairs.append({
                     "name": pair_name,
@@ -360,10 +477,7 @@ class PenumbraDataCollector:
             
             dex_tvl = total_liquidity
             
-            cursor.close()
-            conn.close()
-            
-            logger.info(f"Trading data: {len(top_pairs)} pairs, ${total_volume:,.0f} volume, ${dex_tvl:,.0f} TVL")
+            logger.info("Trading data: %d pairs, $%.0f volume, $%.0f TVL", len(top_pairs), total_volume, dex_tvl)
             
             return {
                 'active_pairs_count': len(top_pairs),
@@ -384,62 +498,17 @@ class PenumbraDataCollector:
             }
             
         except Exception as e:
-            logger.error(f"Error getting indexer trading data: {e}")
+            logger.error("Error getting indexer trading data: %s", e)
             return self.get_fallback_trading_data()
-        finally:
-            # Clean up temporary certificate file
-            if temp_cert_file and os.path.exists(temp_cert_file.name):
-                try:
-                    os.unlink(temp_cert_file.name)
-                except Exception:
-                    pass  # Ignore cleanup errors
     
     def get_fallback_trading_data(self) -> Dict[str, Any]:
         """Fallback trading data when indexer is unavailable"""
         logger.warning("Using fallback trading data")
         
-        top_pairs = [
-            {"name": "UM/USDC", "volume": "4,142.8 USDC", "volume_usd": 4142.8},
-            {"name": "T414E72/UM", "volume": "1,040.0 USDC", "volume_usd": 1040.0},
-            {"name": "UM/T414E72", "volume": "1,013.4 USDC", "volume_usd": 1013.4},
-            {"name": "ATOM/UM", "volume": "38.4 USDC", "volume_usd": 38.4},
-            {"name": "ATOM/USDC", "volume": "35.4 USDC", "volume_usd": 35.4}
-        ]
-        
-        total_volume = sum(pair['volume_usd'] for pair in top_pairs)
-        dex_tvl = total_volume * 25  # 25x estimate
-        
-        return {
-            'active_pairs_count': 5,
-            'top_pairs': top_pairs,
-            'total_volume_24h': total_volume,
-            'dex_tvl': dex_tvl,
-            'lqt_total_participants': 1024,
-            'lqt_active_24h': 25,
-            'lqt_volume_24h': total_volume * 0.8,
-            'active_addresses_daily': min(85 + int(total_volume / 800), 150),  # Dynamic based on volume
-            'active_addresses_weekly': min(85 * 6 + int(total_volume / 150), 800),  # Weekly estimate
-            'trading_pairs_count': 5,
-            'unique_asset_types': 10
-        }
+        return {**_FALLBACK_TRADING_DATA, 'top_pairs': list(_FALLBACK_TOP_PAIRS)}
     
     async def get_transactions_data(self) -> Dict[str, Any]:
         """Get transaction data"""
-        try:
-            # For now, use estimated values
-            # In a full implementation, you'd query recent blocks for real tx counts
-            total_24h = 253
-            per_second = total_24h / (24 * 60 * 60)  # ~0.003
-            per_minute = per_second * 60  # ~0.176
-            rate_per_hour = total_24h / 24  # ~10.5
-            
-            return {
-                'total_24h': total_24h,
-                'per_second': round(per_second, 3),
-                'per_minute': round(per_minute, 1),
-                'rate_per_hour': round(rate_per_hour, 1)
-            }
-            
-        except Exception as e:
-            logger.error(f"Error getting transaction data: {e}")
-            return {'total_24h': 0, 'per_second': 0, 'per_minute': 0, 'rate_per_hour': 0}
+        # For now, use estimated values
+        # In a full implementation, you'd query recent blocks for real tx counts
+        return _TX_DEFAULTS.copy()
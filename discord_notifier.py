@@ -3,19 +3,40 @@ Discord notification sender
 """
 
 import aiohttp
+import asyncio
 import ssl
 import logging
-from typing import Dict, Any
+import time
+from typing import Dict, Any, Optional
 
 logger = logging.getLogger('discord-notifier')
 
+# Built once per process: create_default_context() parses the system CA bundle
+_SSL_CONTEXT = ssl.create_default_context()
+
 class DiscordNotifier:
-    def __init__(self, webhook_url: str):
+    def __init__(self, webhook_url: str, session: Optional[aiohttp.ClientSession] = None):
         self.webhook_url = webhook_url
+        # A caller-supplied session is shared and left open on stop()
+        self._session = session
+        self._owns_session = session is None
+        # Monotonic time until which Discord has asked us to hold off posting
+        self._ratelimited_until = 0.0
         logger.info("Discord notifier initialized")
     
-    async def send_message(self, message: str, title: str = "Penumbra Network Update"):
-        """Send message to Discord"""
+    async def start(self):
+        """Open the persistent HTTP session used for webhook posts"""
+        if self._owns_session and self._session is None:
+            self._session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(ssl=_SSL_CONTEXT))
+    
+    async def stop(self):
+        """Close the webhook HTTP session"""
+        if self._owns_session and self._session:
+            await self._session.close()
+            self._session = None
+    
+    async def send_message(self, message: str, title: str = "Penumbra Network Update") -> bool:
+        """Send message to Discord; False if Discord rejected it for good (e.g. deleted webhook)"""
         try:
             # Create Discord embed
             embed = {
@@ -32,16 +53,44 @@ class DiscordNotifier:
                 "embeds": [embed]
             }
             
-            ssl_context = ssl.create_default_context()
-            ssl_context.check_hostname = False
-            ssl_context.verify_mode = ssl.CERT_NONE
-            async with aiohttp.ClientSession() as session:
-                async with session.post(self.webhook_url, json=payload, ssl=ssl_context) as resp:
-                    if resp.status == 204:
-                        logger.info("Discord message sent successfully")
-                    else:
+            assert self._session is not None, "call start() before sending"
+            
+            # A 429 is retried once after the advertised wait; sleeping here only delays
+            # the calling (background) task, not the rest of the event loop
+            for attempt in range(2):
+                delay = self._ratelimited_until - time.monotonic()
+                if delay > 0:
+                    logger.info(f"Discord rate limited, waiting {delay:.1f}s")
+                    await asyncio.sleep(delay)
+                
+                async with self._session.post(self.webhook_url, json=payload) as resp:
+                    self._note_rate_limit(resp)
+                    if resp.status == 429 and attempt == 0:
+                        continue
+                    if resp.status == 429 or resp.status >= 500:
+                        # Transient; the caller retries on its next tick
+                        raise RuntimeError(f"Discord error: {resp.status}")
+                    if resp.status >= 300:
+                        # Bad webhook or payload; reposting won't help
                         logger.error(f"Discord error: {resp.status}")
+                        return False
+                    logger.info("Discord message sent successfully")
+                    return True
                         
         except Exception as e:
             logger.error(f"Error sending Discord message: {e}")
             raise
+    
+    def _note_rate_limit(self, resp: aiohttp.ClientResponse):
+        """Record when the next post may go out, from Discord's rate limit headers"""
+        if resp.status == 429:
+            reset_after = resp.headers.get('Retry-After') or resp.headers.get('X-RateLimit-Reset-After')
+        elif resp.headers.get('X-RateLimit-Remaining') == '0':
+            reset_after = resp.headers.get('X-RateLimit-Reset-After')
+        else:
+            return
+        
+        try:
+            self._ratelimited_until = time.monotonic() + float(reset_after)
+        except (TypeError, ValueError):
+            pass
@@ -8,13 +8,17 @@ import os
 import asyncio
 import logging
 import time
-from datetime import datetime, timedelta
 from typing import Dict, Any
 
-from data_collector import PenumbraDataCollector
+try:
+    import uvloop
+except ImportError:  # uvloop is not available on Windows; use the stock asyncio loop
+    uvloop = None
+
+from data_collector import PenumbraDataCollector, create_client_session
 from discord_notifier import DiscordNotifier
 from metrics_server import MetricsServer
-from config import Config
+from config import load_config
 
 # Setup logging
 logging.basicConfig(
@@ -23,20 +27,76 @@ logging.basicConfig(
 )
 logger = logging.getLogger('penumbra-analytics')
 
+# How long shutdown waits for in-flight Discord posts
+DISCORD_DRAIN_TIMEOUT_SECONDS = 10
+
+_DISCORD_TEMPLATE = """🌟 **Penumbra Network Status Update**
+
+📊 **Network Health**
+• Current Epoch: **{current_epoch}** (Next in: **{epoch_countdown}**)
+• Block Height: **{block_height}**
+• Network Uptime: **{network_uptime_percentage}**
+
+💰 **Total Value Locked (TVL)**
+• Total TVL: **{tvl_dex_usd}**
+• DEX TVL: **{tvl_dex_usd} USDC**
+• Staking TVL: **{total_staked_um} UM**
+
+🔄 **Trading Activity**
+• Active Trading Pairs: **{active_pairs_count}**
+• 24h Volume: **{total_volume_24h_usd} USDC**
+• Top 3 Pairs:
+{top_pairs_block}
+
+👥 **Active Users**
+• Daily Active: **{active_daily}** addresses
+• Weekly Active: **{active_weekly}** addresses
+
+🏆 **LQT Tournament**
+• Total Participants: **{lqt_total_participants}**
+• Active (24h): **{lqt_active_participants_24h}**
+• 24h Volume: **{lqt_volume_24h_usd}**
+
+⚡ **Network Activity**
+• Transactions (24h): **{transactions_total_24h}**
+• Tx Rate: **{transactions_per_minute}/min**
+
+⏰ **Next Update:** {next_update} ({discord_interval_hours}h)
+
+*Data powered by Penumbra RPC & Pindexer*"""
+_format_discord_template = _DISCORD_TEMPLATE.format_map
+
+# Number formatters bound once, so the format spec isn't re-parsed for every value
+_fmt_int = "{:,}".format
+_fmt_amount = "{:,.0f}".format
+_fmt_usd = "${:,.0f}".format
+_fmt_pct = "{:.1f}%".format
+_fmt_whole = "{:.0f}".format
+
 class PenumbraAnalyticsService:
+    __slots__ = (
+        'config', 'data_collector', 'discord_notifier', 'metrics_server', '_http',
+        'update_interval', 'discord_interval_hours', '_discord_interval_seconds',
+        '_last_discord_monotonic', '_discord_sem', '_discord_tasks',
+    )
+    
     def __init__(self):
-        self.config = Config()
-        self.data_collector = PenumbraDataCollector(
-            rpc_endpoint=self.config.PENUMBRA_RPC_ENDPOINT,
-            indexer_endpoint=self.config.PENUMBRA_INDEXER_ENDPOINT,
-            indexer_ca_cert=self.config.PENUMBRA_INDEXER_CA_CERT
-        )
-        self.discord_notifier = DiscordNotifier(self.config.DISCORD_WEBHOOK_URL)
+        self.config = load_config()
+        # Shared HTTP session and the collector and notifier using it are created in run(),
+        # since aiohttp sessions must be opened inside the running event loop
+        self._http = None
+        self.data_collector = None
+        self.discord_notifier = None
         self.metrics_server = MetricsServer(port=self.config.METRICS_PORT)
         
-        self.last_discord_message = datetime.now() - timedelta(hours=4)  # Send first message immediately
         self.update_interval = self.config.UPDATE_INTERVAL_SECONDS
         self.discord_interval_hours = self.config.DISCORD_INTERVAL_HOURS
+        self._discord_interval_seconds = self.discord_interval_hours * 3600
+        self._last_discord_monotonic = time.monotonic() - self._discord_interval_seconds  # Send first message immediately
+        
+        # At most one Discord post in flight; pending posts are awaited on shutdown
+        self._discord_sem = asyncio.Semaphore(1)
+        self._discord_tasks = set()
         
         logger.info("Penumbra Analytics Service initialized")
     
@@ -47,11 +107,12 @@ class PenumbraAnalyticsService:
             data = await self.data_collector.collect_all_data()
             
             # Update Prometheus metrics
-            self.metrics_server.update_metrics(data)
+            await self.metrics_server.update_metrics(data, now=time.time())
             
-            logger.info(f"Data updated - Epoch: {data['network']['current_epoch']}, "
-                       f"Height: {data['network']['block_height']}, "
-                       f"TVL: ${data['tvl']['total_usd']:,.0f}")
+            if logger.isEnabledFor(logging.INFO):
+                logger.info(f"Data updated - Epoch: {data['network']['current_epoch']}, "
+                           f"Height: {data['network']['block_height']}, "
+                           f"TVL: ${data['tvl']['total_usd']:,.0f}")
             
             return data
             
@@ -61,21 +122,33 @@ class PenumbraAnalyticsService:
     
     def should_send_discord_message(self) -> bool:
         """Check if it's time to send Discord message"""
-        now = datetime.now()
-        time_since_last = now - self.last_discord_message
-        return time_since_last.total_seconds() >= (self.discord_interval_hours * 3600)
+        return (time.monotonic() - self._last_discord_monotonic) >= self._discord_interval_seconds
     
     async def send_discord_update(self, data: Dict[str, Any]):
         """Send Discord status update"""
         try:
-            message = self.format_discord_message(data)
-            await self.discord_notifier.send_message(message)
-            self.last_discord_message = datetime.now()
-            logger.info("Discord update sent successfully")
+            # Formatting only reads `data` and fixed settings, so it can run off the event loop
+            message = await asyncio.to_thread(self.format_discord_message, data)
+            sent = await self.discord_notifier.send_message(message)
+            # A rejected post also waits out the full interval instead of repeating every tick
+            self._last_discord_monotonic = time.monotonic()
+            if sent:
+                logger.info("Discord update sent successfully")
             
         except Exception as e:
             logger.error(f"Error sending Discord message: {e}")
     
+    def schedule_discord_update(self, data: Dict[str, Any]):
+        """Send Discord update in the background so collection isn't stalled"""
+        task = asyncio.create_task(self._send_discord_update_bounded(data))
+        self._discord_tasks.add(task)
+        task.add_done_callback(self._discord_tasks.discard)
+    
+    async def _send_discord_update_bounded(self, data: Dict[str, Any]):
+        """Send Discord update, one post at a time"""
+        async with self._discord_sem:
+            await self.send_discord_update(data)
+    
     def calculate_epoch_countdown(self, current_epoch: int, current_height: int) -> str:
         """Calculate countdown to next epoch"""
         try:
@@ -116,65 +189,47 @@ class PenumbraAnalyticsService:
         transactions = data['transactions']
         addresses = data['addresses']
         
-        # Calculate next update time
-        next_update = datetime.now() + timedelta(hours=self.discord_interval_hours)
+        # Calculate next update time (in UTC, as labelled in the message)
+        next_update = time.strftime('%H:%M UTC', time.gmtime(time.time() + self._discord_interval_seconds))
         
-        # Calculate epoch countdown (Penumbra epochs are ~24 hours)
-        epoch_countdown = self.calculate_epoch_countdown(network['current_epoch'], network.get('block_height', 0))
-        
-        message = f"""🌟 **Penumbra Network Status Update**
-
-📊 **Network Health**
-• Current Epoch: **{network['current_epoch']}** (Next in: **{epoch_countdown}**)
-• Block Height: **{network['block_height']:,}**
-• Network Uptime: **{network['network_uptime_percentage']:.1f}%**
-
-💰 **Total Value Locked (TVL)**
-• Total TVL: **${tvl['dex_usd']:,.0f}**
-• DEX TVL: **${tvl['dex_usd']:,.0f} USDC**
-• Staking TVL: **{data['staking']['total_staked_um']:,.0f} UM**
-
-🔄 **Trading Activity**
-• Active Trading Pairs: **{trading['active_pairs_count']}**
-• 24h Volume: **${trading['total_volume_24h_usd']:,.0f} USDC**
-• Top 3 Pairs:
-{self.format_top_pairs(trading['top_pairs'])}
-
-👥 **Active Users**
-• Daily Active: **{addresses['active_daily']:.0f}** addresses
-• Weekly Active: **{addresses['active_weekly']:.0f}** addresses
-
-🏆 **LQT Tournament**
-• Total Participants: **{lqt['total_participants']:,}**
-• Active (24h): **{lqt['active_participants_24h']}**
-• 24h Volume: **${lqt['volume_24h_usd']:,.0f}**
-
-⚡ **Network Activity**
-• Transactions (24h): **{transactions['total_24h']}**
-• Tx Rate: **{transactions['per_minute']}/min**
-
-⏰ **Next Update:** {next_update.strftime('%H:%M UTC')} ({self.discord_interval_hours}h)
-
-*Data powered by Penumbra RPC & Pindexer*"""
-        
-        return message
+        return _format_discord_template({
+            'current_epoch': network['current_epoch'],
+            # Calculate epoch countdown (Penumbra epochs are ~24 hours)
+            'epoch_countdown': self.calculate_epoch_countdown(network['current_epoch'], network.get('block_height', 0)),
+            'block_height': _fmt_int(network['block_height']),
+            'network_uptime_percentage': _fmt_pct(network['network_uptime_percentage']),
+            'tvl_dex_usd': _fmt_usd(tvl['dex_usd']),
+            'total_staked_um': _fmt_amount(data['staking']['total_staked_um']),
+            'active_pairs_count': trading['active_pairs_count'],
+            'total_volume_24h_usd': _fmt_usd(trading['total_volume_24h_usd']),
+            'top_pairs_block': self.format_top_pairs(trading['top_pairs']),
+            'active_daily': _fmt_whole(addresses['active_daily']),
+            'active_weekly': _fmt_whole(addresses['active_weekly']),
+            'lqt_total_participants': _fmt_int(lqt['total_participants']),
+            'lqt_active_participants_24h': lqt['active_participants_24h'],
+            'lqt_volume_24h_usd': _fmt_usd(lqt['volume_24h_usd']),
+            'transactions_total_24h': transactions['total_24h'],
+            'transactions_per_minute': transactions['per_minute'],
+            'next_update': next_update,
+            'discord_interval_hours': self.discord_interval_hours,
+        })
     
     def format_top_pairs(self, top_pairs) -> str:
         """Format top trading pairs for Discord message"""
         if not top_pairs:
             return "  • No trading pairs available"
         
-        formatted_pairs = []
-        for i, pair in enumerate(top_pairs[:3]):  # Top 3 pairs
-            # Clean up pair name - try to extract meaningful symbols
-            pair_name = pair.get('name', 'Unknown')
-            if len(pair_name) > 20:  # If it's a long hex string
-                pair_name = f"Pair #{i+1}"  # Fallback to generic name
-            
-            volume = pair.get('volume', '0 USDC')
-            formatted_pairs.append(f"  • **{pair_name}**: {volume}")
-        
-        return '\n'.join(formatted_pairs)
+        # Top 3 pairs
+        return '\n'.join([
+            f"  • **{self._pair_display_name(i, pair)}**: {pair.get('volume', '0 USDC')}"
+            for i, pair in enumerate(top_pairs[:3])
+        ])
+    
+    @staticmethod
+    def _pair_display_name(index: int, pair: Dict[str, Any]) -> str:
+        """Pair name for display; long names (raw hex strings) fall back to a generic label"""
+        name = pair.get('name', 'Unknown')
+        return name if len(name) <= 20 else f"Pair #{index + 1}"
     
     async def run(self):
         """Main service loop"""
@@ -183,26 +238,62 @@ class PenumbraAnalyticsService:
         # Start metrics server
         await self.metrics_server.start()
         
+        # One pooled HTTP session for the service, kept open across cycles and
+        # shared by RPC calls and Discord webhook posts
+        self._http = create_client_session()
+        self.discord_notifier = DiscordNotifier(self.config.DISCORD_WEBHOOK_URL, session=self._http)
+        await self.discord_notifier.start()
+        self.data_collector = PenumbraDataCollector(
+            rpc_endpoint=self.config.PENUMBRA_RPC_ENDPOINT,
+            indexer_endpoint=self.config.PENUMBRA_INDEXER_ENDPOINT,
+            indexer_ca_cert=self.config.PENUMBRA_INDEXER_CA_CERT,
+            rpc_concurrency=self.config.RPC_CONCURRENCY,
+            session=self._http
+        )
+        
         try:
-            while True:
-                # Collect and update data
-                data = await self.collect_and_update_data()
-                
-                if data:
-                    # Send Discord message if it's time
-                    if self.should_send_discord_message():
-                        await self.send_discord_update(data)
-                
-                # Wait before next update
-                await asyncio.sleep(self.update_interval)
+            async with self.data_collector:
+                next_deadline = time.monotonic() + self.update_interval
+                while True:
+                    # Collect and update data
+                    data = await self.collect_and_update_data()
+                    
+                    if data:
+                        # Send Discord message if it's time and none is in flight
+                        if self.should_send_discord_message() and not self._discord_sem.locked():
+                            self.schedule_discord_update(data)
+                    
+                    # Wait before next update, sleeping only the residual so the
+                    # collection time doesn't stretch the sampling cadence
+                    delay = next_deadline - time.monotonic()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                        next_deadline += self.update_interval
+                    else:
+                        logger.warning("Loop overran by %.2fs", -delay)
+                        # Skip missed ticks instead of bursting to catch up
+                        next_deadline += self.update_interval * (int(-delay // self.update_interval) + 1)
                 
         except KeyboardInterrupt:
             logger.info("Service stopped by user")
         except Exception as e:
             logger.error(f"Service error: {e}")
         finally:
+            if self._discord_tasks:
+                # Let in-flight Discord posts finish, but don't hang shutdown on a stuck webhook
+                _, pending = await asyncio.wait(set(self._discord_tasks), timeout=DISCORD_DRAIN_TIMEOUT_SECONDS)
+                for task in pending:
+                    task.cancel()
+                # Let cancelled posts unwind before their session is closed
+                await asyncio.gather(*pending, return_exceptions=True)
+            await self.discord_notifier.stop()
+            await self._http.close()
             await self.metrics_server.stop()
 
 if __name__ == "__main__":
     service = PenumbraAnalyticsService()
-    asyncio.run(service.run())
+    if uvloop is not None:
+        # libuv-backed loop; the metrics server and collector share it
+        uvloop.run(service.run())
+    else:
+        asyncio.run(service.run())
@@ -4,13 +4,62 @@ Prometheus metrics server for Grafana integration
 
 import asyncio
 import logging
+import os
+import time
+from email.utils import formatdate
+import orjson
 from aiohttp import web
-from prometheus_client import Gauge, Counter, generate_latest, CONTENT_TYPE_LATEST
-from typing import Dict, Any
+from prometheus_client import Gauge, Counter, CollectorRegistry, REGISTRY, generate_latest, CONTENT_TYPE_LATEST
+from prometheus_client import multiprocess
+from prometheus_client.openmetrics.exposition import (
+    CONTENT_TYPE_LATEST as CONTENT_TYPE_OPENMETRICS,
+    generate_latest as generate_latest_openmetrics,
+)
+from typing import Dict, Any, List, Optional, Tuple
 
 logger = logging.getLogger('metrics-server')
 
+# Data sources reported by the collector; their labelled gauges are created up front
+_DATA_SOURCES = ('google_analytics', 'indexer', 'penumbra_node')
+
+# Aggregation used when several processes write the same gauge (multiprocess mode only)
+_GAUGE_MODE = 'mostrecent'
+
+# Scrapers advertising this media type get the OpenMetrics rendering, others the text format
+_OPENMETRICS_MEDIA_TYPE = 'application/openmetrics-text'
+
+def _render(registry) -> Tuple[bytes, bytes]:
+    """Render the registry in both text and OpenMetrics exposition formats"""
+    return generate_latest(registry), generate_latest_openmetrics(registry)
+
+# Static health payload, serialized once
+_HEALTH_BYTES = orjson.dumps({"status": "healthy", "service": "penumbra-analytics"})
+
 class MetricsServer:
+    __slots__ = (
+        'port', 'app', 'runner', 'site',
+        # Network metrics
+        'block_height', 'current_epoch', 'network_uptime',
+        # TVL metrics
+        'tvl_total', 'tvl_dex', 'tvl_staking',
+        # Trading metrics
+        'trading_pairs_count', 'trading_volume_24h',
+        # Transaction metrics
+        'transactions_24h', 'transactions_per_second', 'transactions_per_minute',
+        # LQT metrics
+        'lqt_participants_total', 'lqt_participants_24h', 'lqt_volume_24h',
+        # Staking metrics
+        'active_validators', 'total_staked_um', 'total_staked_usd',
+        # Address metrics
+        'active_addresses_daily', 'active_addresses_weekly',
+        # Bot health metrics
+        'bot_uptime_hours', 'bot_errors_24h', 'bot_last_update',
+        # Data source health
+        'data_source_healthy', '_ds_gauges',
+        '_updaters', '_registry', '_multiprocess',
+        '_exposition_cache', '_openmetrics_cache', '_exposition_last_modified', '_exposition_lock',
+    )
+    
     def __init__(self, port: int = 8081):
         self.port = port
         self.app = None
@@ -19,115 +68,187 @@ class MetricsServer:
         
         # Define all Prometheus metrics
         self.setup_metrics()
+        
+        # With PROMETHEUS_MULTIPROC_DIR set, values are written to memory-mapped files and
+        # exposed aggregated across processes, so collection and serving can be split apart
+        self._multiprocess = bool(os.environ.get('PROMETHEUS_MULTIPROC_DIR'))
+        if self._multiprocess:
+            self._registry = CollectorRegistry()
+            multiprocess.MultiProcessCollector(self._registry)
+        else:
+            self._registry = REGISTRY
+        
+        # /metrics serves these snapshots; they are regenerated once per data update
+        # (multiprocess mode renders per scrape and never reads them)
+        if self._multiprocess:
+            self._exposition_cache = self._openmetrics_cache = b''
+        else:
+            self._exposition_cache, self._openmetrics_cache = _render(self._registry)
+        self._exposition_last_modified = None
+        self._exposition_lock = asyncio.Lock()
         logger.info(f"Metrics server initialized on port {port}")
     
     def setup_metrics(self):
         """Setup all Prometheus metrics"""
         # Network metrics
-        self.block_height = Gauge('penumbra_block_height', 'Current block height')
-        self.current_epoch = Gauge('penumbra_current_epoch', 'Current epoch')
-        self.network_uptime = Gauge('penumbra_network_uptime_percentage', 'Network uptime percentage')
+        self.block_height = Gauge('penumbra_block_height', 'Current block height', multiprocess_mode=_GAUGE_MODE)
+        self.current_epoch = Gauge('penumbra_current_epoch', 'Current epoch', multiprocess_mode=_GAUGE_MODE)
+        self.network_uptime = Gauge('penumbra_network_uptime_percentage', 'Network uptime percentage', multiprocess_mode=_GAUGE_MODE)
         
         # TVL metrics
-        self.tvl_total = Gauge('penumbra_tvl_total_usd', 'Total Value Locked in USD')
-        self.tvl_dex = Gauge('penumbra_tvl_dex_usd', 'DEX TVL in USD')
-        self.tvl_staking = Gauge('penumbra_tvl_staking_usd', 'Staking TVL in USD')
+        self.tvl_total = Gauge('penumbra_tvl_total_usd', 'Total Value Locked in USD', multiprocess_mode=_GAUGE_MODE)
+        self.tvl_dex = Gauge('penumbra_tvl_dex_usd', 'DEX TVL in USD', multiprocess_mode=_GAUGE_MODE)
+        self.tvl_staking = Gauge('penumbra_tvl_staking_usd', 'Staking TVL in USD', multiprocess_mode=_GAUGE_MODE)
         
         # Trading metrics
-        self.trading_pairs_count = Gauge('penumbra_trading_pairs_count', 'Number of active trading pairs')
-        self.trading_volume_24h = Gauge('penumbra_trading_volume_24h_usd', '24h trading volume in USD')
+        self.trading_pairs_count = Gauge('penumbra_trading_pairs_count', 'Number of active trading pairs', multiprocess_mode=_GAUGE_MODE)
+        self.trading_volume_24h = Gauge('penumbra_trading_volume_24h_usd', '24h trading volume in USD', multiprocess_mode=_GAUGE_MODE)
         
         # Transaction metrics
-        self.transactions_24h = Gauge('penumbra_transactions_24h_total', 'Total transactions in 24h')
-        self.transactions_per_second = Gauge('penumbra_transactions_per_second', 'Transactions per second')
-        self.transactions_per_minute = Gauge('penumbra_transactions_per_minute', 'Transactions per minute')
+        self.transactions_24h = Gauge('penumbra_transactions_24h_total', 'Total transactions in 24h', multiprocess_mode=_GAUGE_MODE)
+        self.transactions_per_second = Gauge('penumbra_transactions_per_second', 'Transactions per second', multiprocess_mode=_GAUGE_MODE)
+        self.transactions_per_minute = Gauge('penumbra_transactions_per_minute', 'Transactions per minute', multiprocess_mode=_GAUGE_MODE)
         
         # LQT metrics
-        self.lqt_participants_total = Gauge('penumbra_lqt_participants_total', 'Total LQT participants')
-        self.lqt_participants_24h = Gauge('penumbra_lqt_participants_24h', 'Active LQT participants in 24h')
-        self.lqt_volume_24h = Gauge('penumbra_lqt_volume_24h_usd', 'LQT volume in 24h USD')
+        self.lqt_participants_total = Gauge('penumbra_lqt_participants_total', 'Total LQT participants', multiprocess_mode=_GAUGE_MODE)
+        self.lqt_participants_24h = Gauge('penumbra_lqt_participants_24h', 'Active LQT participants in 24h', multiprocess_mode=_GAUGE_MODE)
+        self.lqt_volume_24h = Gauge('penumbra_lqt_volume_24h_usd', 'LQT volume in 24h USD', multiprocess_mode=_GAUGE_MODE)
         
         # Staking metrics
-        self.active_validators = Gauge('penumbra_active_validators', 'Number of active validators')
-        self.total_staked_um = Gauge('penumbra_total_staked_um', 'Total staked UM')
-        self.total_staked_usd = Gauge('penumbra_total_staked_usd', 'Total staked value in USD')
+        self.active_validators = Gauge('penumbra_active_validators', 'Number of active validators', multiprocess_mode=_GAUGE_MODE)
+        self.total_staked_um = Gauge('penumbra_total_staked_um', 'Total staked UM', multiprocess_mode=_GAUGE_MODE)
+        self.total_staked_usd = Gauge('penumbra_total_staked_usd', 'Total staked value in USD', multiprocess_mode=_GAUGE_MODE)
         
         # Address metrics
-        self.active_addresses_daily = Gauge('penumbra_active_addresses_daily', 'Active addresses daily')
-        self.active_addresses_weekly = Gauge('penumbra_active_addresses_weekly', 'Active addresses weekly')
+        self.active_addresses_daily = Gauge('penumbra_active_addresses_daily', 'Active addresses daily', multiprocess_mode=_GAUGE_MODE)
+        self.active_addresses_weekly = Gauge('penumbra_active_addresses_weekly', 'Active addresses weekly', multiprocess_mode=_GAUGE_MODE)
         
         # Bot health metrics
-        self.bot_uptime_hours = Gauge('penumbra_bot_uptime_hours', 'Bot uptime in hours')
+        self.bot_uptime_hours = Gauge('penumbra_bot_uptime_hours', 'Bot uptime in hours', multiprocess_mode=_GAUGE_MODE)
         self.bot_errors_24h = Counter('penumbra_bot_errors_24h_total', 'Bot errors in 24h')
-        self.bot_last_update = Gauge('penumbra_bot_last_update_timestamp', 'Last update timestamp')
+        self.bot_last_update = Gauge('penumbra_bot_last_update_timestamp', 'Last update timestamp', multiprocess_mode=_GAUGE_MODE)
         
         # Data source health
-        self.data_source_healthy = Gauge('penumbra_data_source_healthy', 'Data source health status', ['source'])
-    
-    def update_metrics(self, data: Dict[str, Any]):
-        """Update all metrics with new data"""
-        try:
+        self.data_source_healthy = Gauge('penumbra_data_source_healthy', 'Data source health status', ['source'], multiprocess_mode=_GAUGE_MODE)
+        # Labelled children by source name, resolved once
+        self._ds_gauges = {source: self.data_source_healthy.labels(source=source) for source in _DATA_SOURCES}
+        
+        # Bound setters paired with the path of their value in the collected data
+        self._updaters = [
             # Network metrics
-            self.block_height.set(data['network']['block_height'])
-            self.current_epoch.set(data['network']['current_epoch'])
-            self.network_uptime.set(data['network']['network_uptime_percentage'])
+            (self.block_height.set, ('network', 'block_height')),
+            (self.current_epoch.set, ('network', 'current_epoch')),
+            (self.network_uptime.set, ('network', 'network_uptime_percentage')),
             
             # TVL metrics
-            self.tvl_total.set(data['tvl']['total_usd'])
-            self.tvl_dex.set(data['tvl']['dex_usd'])
-            self.tvl_staking.set(data['tvl']['staking_usd'])
+            (self.tvl_total.set, ('tvl', 'total_usd')),
+            (self.tvl_dex.set, ('tvl', 'dex_usd')),
+            (self.tvl_staking.set, ('tvl', 'staking_usd')),
             
             # Trading metrics
-            self.trading_pairs_count.set(data['trading']['active_pairs_count'])
-            self.trading_volume_24h.set(data['trading']['total_volume_24h_usd'])
+            (self.trading_pairs_count.set, ('trading', 'active_pairs_count')),
+            (self.trading_volume_24h.set, ('trading', 'total_volume_24h_usd')),
             
             # Transaction metrics
-            self.transactions_24h.set(data['transactions']['total_24h'])
-            self.transactions_per_second.set(data['transactions']['per_second'])
-            self.transactions_per_minute.set(data['transactions']['per_minute'])
+            (self.transactions_24h.set, ('transactions', 'total_24h')),
+            (self.transactions_per_second.set, ('transactions', 'per_second')),
+            (self.transactions_per_minute.set, ('transactions', 'per_minute')),
             
             # LQT metrics
-            self.lqt_participants_total.set(data['lqt']['total_participants'])
-            self.lqt_participants_24h.set(data['lqt']['active_participants_24h'])
-            self.lqt_volume_24h.set(data['lqt']['volume_24h_usd'])
+            (self.lqt_participants_total.set, ('lqt', 'total_participants')),
+            (self.lqt_participants_24h.set, ('lqt', 'active_participants_24h')),
+            (self.lqt_volume_24h.set, ('lqt', 'volume_24h_usd')),
             
             # Staking metrics
-            self.active_validators.set(data['staking']['active_validators'])
-            self.total_staked_um.set(data['staking']['total_staked_um'])
-            self.total_staked_usd.set(data['staking']['total_staked_usd'])
+            (self.active_validators.set, ('staking', 'active_validators')),
+            (self.total_staked_um.set, ('staking', 'total_staked_um')),
+            (self.total_staked_usd.set, ('staking', 'total_staked_usd')),
             
             # Address metrics
-            self.active_addresses_daily.set(data['addresses']['active_daily'])
-            self.active_addresses_weekly.set(data['addresses']['active_weekly'])
+            (self.active_addresses_daily.set, ('addresses', 'active_daily')),
+            (self.active_addresses_weekly.set, ('addresses', 'active_weekly')),
             
             # Bot health metrics
-            self.bot_uptime_hours.set(data['bot_health']['uptime_hours'])
-            
-            # Data source health
-            for source_name, source_data in data['data_sources'].items():
-                self.data_source_healthy.labels(source=source_name).set(1 if source_data['healthy'] else 0)
-            
-            # Update timestamp
-            import time
-            self.bot_last_update.set(time.time())
+            (self.bot_uptime_hours.set, ('bot_health', 'uptime_hours')),
+        ]
+    
+    def _extract(self, data: Dict[str, Any]) -> Optional[Tuple[List[float], List[Tuple[str, bool]]]]:
+        """Pull metric values and data source health out of the collected data; None if it's malformed"""
+        try:
+            values = []
+            for _, path in self._updaters:
+                value = data
+                for key in path:
+                    value = value[key]
+                # Coerced here so a non-numeric value is caught before any gauge is written
+                values.append(float(value))
             
-            logger.debug("Metrics updated successfully")
+            sources = [(source_name, source_data['healthy']) for source_name, source_data in data['data_sources'].items()]
+            return values, sources
             
         except Exception as e:
             logger.error(f"Error updating metrics: {e}")
+            return None
+    
+    def _write(self, values: List[float], sources: List[Tuple[str, bool]]):
+        """Set every gauge from values produced by _extract"""
+        for (setter, _), value in zip(self._updaters, values):
+            setter(value)
+        
+        # Data source health
+        for source_name, healthy in sources:
+            gauge = self._ds_gauges.get(source_name)
+            if gauge is None:
+                gauge = self._ds_gauges[source_name] = self.data_source_healthy.labels(source=source_name)
+            gauge.set(1 if healthy else 0)
+    
+    async def update_metrics(self, data: Dict[str, Any], now: Optional[float] = None):
+        """Update all metrics with new data, stamped with `now` (defaults to the current time)"""
+        # Gauges are only touched once the whole payload has been read successfully
+        extracted = self._extract(data)
+        if extracted is None:
+            return
+        self._write(*extracted)
+        
+        # Update timestamp
+        now = time.time() if now is None else now
+        self.bot_last_update.set(now)
+        
+        # In multiprocess mode scrapes render fresh from the shared files instead
+        if self._multiprocess:
+            return
+        
+        # Render the exposition once here instead of on every scrape, off the event loop;
+        # the attributes are swapped together so scrapes never see a mixed snapshot
+        async with self._exposition_lock:
+            exposition, openmetrics = await asyncio.to_thread(_render, self._registry)
+            self._exposition_cache = exposition
+            self._openmetrics_cache = openmetrics
+            self._exposition_last_modified = formatdate(now, usegmt=True)
     
     async def metrics_handler(self, request):
         """Handle /metrics endpoint"""
-        try:
-            metrics_output = generate_latest()
-            return web.Response(body=metrics_output, headers={'Content-Type': CONTENT_TYPE_LATEST})
-        except Exception as e:
-            logger.error(f"Error generating metrics: {e}")
-            return web.Response(text="Error generating metrics", status=500)
+        if self._multiprocess:
+            # Other processes may have written since our last update, so render per scrape
+            exposition, openmetrics = await asyncio.to_thread(_render, self._registry)
+            last_modified = None
+        else:
+            exposition, openmetrics = self._exposition_cache, self._openmetrics_cache
+            last_modified = self._exposition_last_modified
+        
+        if _OPENMETRICS_MEDIA_TYPE in request.headers.get('Accept', ''):
+            body, content_type = openmetrics, CONTENT_TYPE_OPENMETRICS
+        else:
+            body, content_type = exposition, CONTENT_TYPE_LATEST
+        
+        headers = {'Content-Type': content_type, 'Vary': 'Accept'}
+        if last_modified:
+            headers['Last-Modified'] = last_modified
+        return web.Response(body=body, headers=headers)
     
     async def health_handler(self, request):
         """Handle /health endpoint"""
-        return web.json_response({"status": "healthy", "service": "penumbra-analytics"})
+        return web.Response(body=_HEALTH_BYTES, content_type='application/json')
     
     async def start(self):
         """Start the metrics server"""
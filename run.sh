@@ -27,7 +27,7 @@ else
     source venv/bin/activate
 
     # Check Python dependencies
-    if ! python -c "import aiohttp, prometheus_client, psycopg2" 2>/dev/null; then
+    if ! python -c "import aiohttp, prometheus_client, asyncpg, orjson" 2>/dev/null; then
         echo "📦 Installing dependencies..."
         pip install -r requirements.txt && sleep 1
     fi